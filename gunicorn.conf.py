@@ -0,0 +1,9 @@
+# Production server settings, picked up automatically by:
+#   sudo gunicorn packet_sniffer:app
+#
+# The packet buffer lives in the worker process, so there must be exactly one
+# worker; concurrent API requests are served by its threads instead.
+bind = "0.0.0.0:5000"
+workers = 1
+worker_class = "gthread"
+threads = 8
@@ -4,157 +4,717 @@ Packet sniffer using scapy to capture network packets and send them to the backe
 Filters out websocket connections to avoid hearing the project's own traffic.
 """
 
+import os
+import math
 import json
+import ctypes
 import time
+import mmap
+import select
+import socket
+import struct
+import itertools
+import ipaddress
+import collections
+import functools
 import threading
+import traceback
+import multiprocessing
+from multiprocessing import shared_memory
 from datetime import datetime
-from collections import deque
+import numpy as np
+import orjson
 from scapy.all import sniff, IP, TCP, UDP, ARP, ICMP, Raw
 from scapy.layers.inet6 import IPv6
-import uuid
+
+# Optional compiled multi-pattern matcher for payload signatures
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
 # Configuration
 WEBSOCKET_PORT = 5173  # Port used by the websocket server
+MAX_PACKETS = 10000  # Number of packets kept in memory
+# BPF filter applied by the kernel/driver so our own websocket traffic never reaches Python
+CAPTURE_FILTER = f"not (tcp port {WEBSOCKET_PORT})"
+# "process" reads frames from an AF_PACKET socket in a separate capture process that
+# hands them over through a shared-memory ring; "raw" reads the same socket from a
+# thread in this process. Both parse headers with struct and are Linux only, falling
+# back to Scapy elsewhere. "scapy" always uses Scapy's sniff() and dissection.
+CAPTURE_BACKEND = "process"
+BATCH_SIZE = 100  # Packets parsed before they are stored in one go
+BATCH_MAX_DELAY = 0.1  # Seconds a partial batch may wait while packets keep arriving
+LOG_BUFFER_SIZE = 1000  # Capture-path log messages kept for printing and for /api/logs
 
 # Note: On Windows, you need Npcap installed (not WinPcap)
 # Download from: https://nmap.org/npcap/
 
+# Header layouts for the raw-socket fast path
+ETH_P_ALL = 0x0003
+ARPHRD_ETHER = 1
+ARPHRD_LOOPBACK = 772
+_ETH_TYPE = struct.Struct("!H")  # EtherType / VLAN inner type
+_IPV4 = struct.Struct("!BBHHHBBH4s4s")
+_IPV6 = struct.Struct("!IHBB16s16s")
+_TCP = struct.Struct("!HHLLBBHHH")
+_UDP = struct.Struct("!HHHH")
+_ARP_IPV4 = struct.Struct("!HHBBH6s4s6s4s")
+_RING_HDR = struct.Struct("=IdHHI")  # Ring slot header: captured length, timestamp, hatype, ethertype, length on the wire
+RING_SLOT_SIZE = 2048  # Bytes per ring slot (header + frame, longer frames are truncated)
+RING_SLOTS = MAX_PACKETS
+# AF_PACKET receive ring (PACKET_MMAP with TPACKET_V3, see linux/if_packet.h)
+SOL_PACKET = 263
+PACKET_RX_RING = 5
+PACKET_VERSION = 10
+TPACKET_V3 = 2
+TP_STATUS_USER = 1
+RX_RING_BLOCK_SIZE = 1 << 18  # 256 KiB per block
+RX_RING_BLOCKS = 32
+RX_RING_BLOCK_TIMEOUT_MS = 50  # Kernel hands over partially filled blocks after this long
+_TPACKET_REQ3 = struct.Struct("=7I")
+_BLOCK_HDR = struct.Struct("=8xIII")  # block_status, num_pkts, offset_to_first_pkt
+_TP3_HDR = struct.Struct("=IIIIIIH")  # next_offset, sec, nsec, snaplen, len, status, mac
+_TP3_SLL = 48  # Offset of the sockaddr_ll after each tpacket3_hdr
+SO_ATTACH_FILTER = 26
+
+def websocket_drop_program(port=WEBSOCKET_PORT):
+    """Classic BPF program for "not (tcp port <port>)" on Ethernet-framed links.
+    
+    Same instructions tcpdump -dd generates: IPv6 and unfragmented IPv4 TCP
+    segments to or from port are dropped (ret 0), everything else is accepted.
+    Lets the kernel filter our websocket traffic even without libpcap.
+    """
+    insn = struct.Struct("=HBBI").pack  # code, jt, jf, k
+    return b"".join([
+        insn(0x28, 0, 0, 12),        # ldh [12]              (EtherType)
+        insn(0x15, 0, 6, 0x86DD),    # jeq #IPv6             else -> IPv4 check
+        insn(0x30, 0, 0, 20),        # ldb [20]              (IPv6 next header)
+        insn(0x15, 0, 15, 6),        # jeq #TCP              else -> accept
+        insn(0x28, 0, 0, 54),        # ldh [54]              (source port)
+        insn(0x15, 12, 0, port),     # jeq #port             -> drop
+        insn(0x28, 0, 0, 56),        # ldh [56]              (destination port)
+        insn(0x15, 10, 11, port),    # jeq #port             -> drop, else accept
+        insn(0x15, 0, 10, 0x0800),   # jeq #IPv4             else -> accept
+        insn(0x30, 0, 0, 23),        # ldb [23]              (IPv4 protocol)
+        insn(0x15, 0, 8, 6),         # jeq #TCP              else -> accept
+        insn(0x28, 0, 0, 20),        # ldh [20]              (fragment offset)
+        insn(0x45, 6, 0, 0x1FFF),    # jset #0x1fff          non-first fragment -> accept
+        insn(0xB1, 0, 0, 14),        # ldxb 4*([14]&0xf)     (IPv4 header length)
+        insn(0x48, 0, 0, 14),        # ldh [x + 14]          (source port)
+        insn(0x15, 2, 0, port),      # jeq #port             -> drop
+        insn(0x48, 0, 0, 16),        # ldh [x + 16]          (destination port)
+        insn(0x15, 0, 1, port),      # jeq #port             else -> accept
+        insn(0x06, 0, 0, 0),         # drop: ret #0
+        insn(0x06, 0, 0, 0x40000),   # accept: ret #262144
+    ])
+
+def attach_bpf_program(sock, program):
+    """Attach classic BPF bytecode (8 bytes per instruction) with SO_ATTACH_FILTER."""
+    insns = ctypes.create_string_buffer(program, len(program))
+    # struct sock_fprog { unsigned short len; struct sock_filter *filter; }
+    fprog = struct.pack("HL", len(program) // 8, ctypes.addressof(insns))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+
+_U16 = struct.Struct("=H")
+_U32 = struct.Struct("=I")
+_TCP_FLAGS = "FSRPAUECN"  # Same letter order as Scapy's TCP flag strings
+# Flag string for every 9-bit flag value, so the hot path does a list index instead of a join
+_TCP_FLAG_STRINGS = ["".join(c for i, c in enumerate(_TCP_FLAGS) if bits >> i & 1) for bits in range(512)]
+
+# Literal payload signatures: tag name -> bytes to look for (case-sensitive).
+# Matching names are reported in each packet's "tags" field.
+SIGNATURES = {
+    "http-request": b"HTTP/1.",
+    "http-host": b"\r\nHost: ",
+    "path-traversal": b"../..",
+    "passwd-file": b"/etc/passwd",
+    "unix-shell": b"/bin/sh",
+    "cmd-exe": b"cmd.exe",
+    "script-tag": b"<script",
+    "sql-union": b"UNION SELECT",
+    "nop-sled": b"\x90" * 16,
+}
+
+# IP protocol numbers stored in the "proto" column (0 = not IPv4)
+PROTO_NUMBERS = {"TCP": 6, "UDP": 17, "ICMP": 1}
+
+# Printable ASCII plus tab/newline/carriage return
+_PRINTABLE = bytes(range(0x20, 0x7F)) + b"\t\n\r"
+
+def is_printable(data):
+    """True if data is entirely printable ASCII text.
+    
+    Both checks run as C loops over the buffer: isascii() rejects binary
+    data early, translate() then deletes every printable byte in one pass.
+    """
+    return data.isascii() and not data.translate(None, _PRINTABLE)
+
+def ipv4_to_int(addr):
+    """IPv4 address string as an integer for the columnar store (None if not IPv4)."""
+    try:
+        return int.from_bytes(socket.inet_aton(addr), "big")
+    except (OSError, TypeError):
+        return None
+
+def not_websocket(packet):
+    """Python-side fallback for CAPTURE_FILTER when BPF filters are unavailable."""
+    if TCP in packet:
+        tcp = packet[TCP]
+        return tcp.sport != WEBSOCKET_PORT and tcp.dport != WEBSOCKET_PORT
+    return True
+
+class RawCapture:
+    """AF_PACKET capture socket, read a batch of frames at a time.
+    
+    Uses a kernel-filled PACKET_MMAP receive ring (TPACKET_V3) when available:
+    the kernel writes packets into pre-allocated, mmap'ed blocks and a single
+    poll wakeup hands over a whole block, so no syscall is made per packet.
+    Otherwise frames are read with recvfrom.
+    """
+    def __init__(self, sock):
+        self.sock = sock
+        self.ring = None
+        try:
+            sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+            frame_size = 2048  # Only used by the kernel to validate the request
+            sock.setsockopt(SOL_PACKET, PACKET_RX_RING, _TPACKET_REQ3.pack(
+                RX_RING_BLOCK_SIZE, RX_RING_BLOCKS, frame_size,
+                RX_RING_BLOCK_SIZE // frame_size * RX_RING_BLOCKS, RX_RING_BLOCK_TIMEOUT_MS, 0, 0))
+            self.ring = mmap.mmap(sock.fileno(), RX_RING_BLOCK_SIZE * RX_RING_BLOCKS)
+        except OSError as e:
+            print(f"Packet receive ring unavailable ({e}), reading the socket per packet")
+        self.block = 0
+    
+    @classmethod
+    def open(cls, interface=None):
+        """Open a capture on the interface Scapy's sniff() would use, or None if unavailable.
+        
+        Attaches CAPTURE_FILTER when libpcap can compile it, otherwise the
+        equivalent hand-assembled program on Ethernet-framed interfaces.
+        """
+        if not hasattr(socket, "AF_PACKET"):
+            return None
+        try:
+            sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        except OSError as e:
+            print(f"Raw socket capture unavailable ({e}), falling back to Scapy")
+            return None
+        
+        from scapy.all import conf
+        from scapy.interfaces import network_name
+        from scapy.arch.linux import attach_filter, set_promisc
+        # Same interface Scapy's sniff() would use when none is given
+        iface = network_name(interface or conf.iface)
+        sock.bind((iface, ETH_P_ALL))
+        set_promisc(sock, iface)
+        try:
+            attach_filter(sock, CAPTURE_FILTER, iface)
+        except Exception as e:
+            try:
+                with open(f"/sys/class/net/{iface}/type") as f:
+                    hatype = int(f.read())
+            except (OSError, ValueError):
+                hatype = None
+            if hatype in (ARPHRD_ETHER, ARPHRD_LOOPBACK):
+                attach_bpf_program(sock, websocket_drop_program())
+                print(f"libpcap unavailable ({e}), using built-in BPF filter for websocket traffic")
+            else:
+                print(f"BPF filter unavailable ({e}), filtering websocket traffic in Python")
+        sock.setblocking(False)
+        print(f"Raw socket capture started on {iface}")
+        return cls(sock)
+    
+    def read(self, timeout=1):
+        """Wait up to timeout seconds for packets and return those available.
+        
+        Each packet is (frame, hatype, ethertype, timestamp, length on the wire).
+        """
+        if self.ring is None:
+            if not select.select([self.sock], [], [], timeout)[0]:
+                return []
+            packets = []
+            for _ in range(BATCH_SIZE):
+                try:
+                    frame, addr = self.sock.recvfrom(65535)
+                except BlockingIOError:
+                    break
+                packets.append((frame, addr[3], addr[1], time.time(), len(frame)))
+            return packets
+        
+        ring = self.ring
+        offset = self.block * RX_RING_BLOCK_SIZE
+        status, count, pkt = _BLOCK_HDR.unpack_from(ring, offset)
+        if not status & TP_STATUS_USER:
+            select.select([self.sock], [], [], timeout)
+            status, count, pkt = _BLOCK_HDR.unpack_from(ring, offset)
+            if not status & TP_STATUS_USER:
+                return []
+        pkt += offset
+        packets = []
+        for _ in range(count):
+            next_offset, sec, nsec, snaplen, length, _, mac = _TP3_HDR.unpack_from(ring, pkt)
+            # sockaddr_ll: protocol (network order) at +2, hatype at +8
+            proto = _ETH_TYPE.unpack_from(ring, pkt + _TP3_SLL + 2)[0]
+            hatype = _U16.unpack_from(ring, pkt + _TP3_SLL + 8)[0]
+            packets.append((ring[pkt + mac:pkt + mac + snaplen], hatype, proto, sec + nsec / 1e9, length))
+            pkt += next_offset
+        _U32.pack_into(ring, offset + 8, 0)  # TP_STATUS_KERNEL: hand the block back
+        self.block = (self.block + 1) % RX_RING_BLOCKS
+        return packets
+    
+    def close(self):
+        if self.ring is not None:
+            self.ring.close()
+        self.sock.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+def capture_process(shm_name, head, stop, interface=None):
+    """Capture process body: copy captured frames into the shared-memory ring.
+    
+    Slot seq % RING_SLOTS holds a _RING_HDR followed by the frame. head is the
+    next sequence number and is only bumped once the slot is fully written.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    capture = RawCapture.open(interface)
+    if capture is None:
+        shm.close()
+        return
+    buf = shm.buf
+    hdr_size = _RING_HDR.size
+    capacity = RING_SLOT_SIZE - hdr_size
+    views = [buf[i * RING_SLOT_SIZE + hdr_size:(i + 1) * RING_SLOT_SIZE] for i in range(RING_SLOTS)]
+    try:
+        with capture:
+            while not stop.is_set():
+                # Wait at most a second so stop is rechecked
+                for frame, hatype, proto, timestamp, length in capture.read(1):
+                    seq = head.value
+                    slot = seq % RING_SLOTS
+                    # Frames longer than a slot are truncated; length keeps the real size
+                    captured = min(len(frame), capacity)
+                    views[slot][:captured] = frame[:captured]
+                    _RING_HDR.pack_into(buf, slot * RING_SLOT_SIZE, captured, timestamp, hatype, proto, length)
+                    head.value = seq + 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for view in views:
+            view.release()
+        shm.close()
+
+class PayloadScanner:
+    """Scan payloads for all SIGNATURES in one pass.
+    
+    Uses Hyperscan's compiled literal matcher when installed, and otherwise a
+    bytes search per signature. Only Hyperscan is cheap enough to run on every
+    captured packet (at_capture); the bytes search runs when a packet is
+    served instead. The Hyperscan backend is not thread-safe, which is fine
+    since only the sniffer thread uses it; the bytes backend is.
+    """
+    def __init__(self, signatures):
+        self.names = list(signatures)
+        patterns = [signatures[name] for name in self.names]
+        if not patterns:
+            self.backend = None
+        elif hyperscan is not None:
+            self.backend = "hyperscan"
+            self._db = hyperscan.Database()
+            self._db.compile(expressions=patterns, ids=list(range(len(patterns))), elements=len(patterns),
+                             flags=hyperscan.HS_FLAG_SINGLEMATCH, literal=True)
+        else:
+            self.backend = "bytes"
+            self._patterns = list(enumerate(patterns))
+        self.at_capture = self.backend == "hyperscan"
+    
+    def scan(self, payload):
+        """Names of the signatures found in payload, or None if there are none."""
+        if self.backend == "hyperscan":
+            found = set()
+            self._db.scan(payload, match_event_handler=lambda i, start, end, flags, ctx: found.add(i))
+        elif self.backend == "bytes":
+            found = {i for i, pattern in self._patterns if pattern in payload}
+        else:
+            return None
+        return [self.names[i] for i in sorted(found)] if found else None
+
+class LogBuffer:
+    """Log messages from the capture path without blocking on stdout.
+    
+    write() only appends to bounded deques; a daemon thread prints the pending
+    messages, so a slow or contended stdout never stalls packet capture. If
+    messages arrive faster than they can be printed, the oldest are dropped.
+    The most recent messages are also kept for /api/logs.
+    """
+    def __init__(self, maxlen=LOG_BUFFER_SIZE):
+        self._pending = collections.deque(maxlen=maxlen)
+        self._recent = collections.deque(maxlen=maxlen)
+        self._ready = threading.Event()
+        threading.Thread(target=self._drain, name="log-writer", daemon=True).start()
+    
+    def write(self, message):
+        """Queue a message (safe to call from any thread)."""
+        entry = (time.time(), message)
+        self._pending.append(entry)
+        self._recent.append(entry)
+        self._ready.set()
+    
+    def recent(self, limit=100):
+        """The last limit messages as (epoch timestamp, message), oldest first."""
+        entries = list(self._recent)
+        return entries[-limit:] if limit > 0 else []
+    
+    def _drain(self):
+        while True:
+            self._ready.wait()
+            self._ready.clear()
+            while self._pending:
+                print(self._pending.popleft()[1])
+
+class PacketRecord:
+    """Compact record for one captured packet (slots instead of a per-packet dict)."""
+    __slots__ = ("id", "timestamp", "summary", "protocol", "src_ip", "dst_ip", "src_ip4", "dst_ip4",
+                 "src_port", "dst_port", "size", "truncated", "flags", "tags", "payload", "frame")
+    
+    # Fields exposed in the JSON form; payload/frame are raw bytes hex-encoded on demand
+    FIELDS = ("id", "timestamp", "summary", "protocol", "src_ip", "dst_ip",
+              "src_port", "dst_port", "size", "truncated", "flags", "tags")
+    
+    def __init__(self, packet_id, timestamp, size):
+        self.id = packet_id
+        self.timestamp = timestamp  # Epoch float; converted to ISO only when served over HTTP
+        self.summary = ""
+        self.protocol = "Unknown"
+        self.src_ip = None
+        self.dst_ip = None
+        self.src_ip4 = None  # IPv4 addresses as integers for the query columns (None if not IPv4)
+        self.dst_ip4 = None
+        self.src_port = None
+        self.dst_port = None
+        self.size = size
+        self.truncated = False  # Frame (and so payload/tags) cut short of size by the capture ring
+        self.flags = None
+        self.tags = None  # Matching SIGNATURES names
+        self.payload = None
+        self.frame = b""
+    
+    def asdict(self):
+        """Plain dict of the JSON-visible fields."""
+        return {name: getattr(self, name) for name in self.FIELDS}
+
 class PacketSniffer:
     def __init__(self):
-        self.packets = deque(maxlen=10000)  # Keep last 10k packets in memory
+        # Circular buffer of the last MAX_PACKETS packets: sequence number seq lives
+        # in slot seq % MAX_PACKETS, alongside the same slot in self.cols.
+        self.packets = [None] * MAX_PACKETS
+        self._by_id = {}  # packet id -> (sequence number, packet)
         self.is_sniffing = False
         self.sniff_thread = None
-        self.packet_lock = threading.Lock()
-        self.packet_counter = 0
+        # Only the sniffer thread writes; readers use atomic list slices and dict
+        # lookups, validated against the seq column, instead of a shared lock.
+        self.packet_counter = 0  # Total packets ever stored, also the next sequence number
+        self._id_seq = itertools.count()  # Cheap monotonic packet IDs (next() is atomic under the GIL)
+        # Random per-run suffix so IDs stay unique across restarts (the browser and
+        # the AI chat sessions keep state keyed by packet ID)
+        self._id_suffix = "-" + os.urandom(4).hex()
+        # Columnar copy of the filterable fields, slot for slot with self.packets,
+        # so queries are vectorized NumPy compares.
+        self.cols = {
+            "seq": np.full(MAX_PACKETS, -1, np.int64),  # -1 = empty slot
+            "ts": np.zeros(MAX_PACKETS, np.float64),
+            "src_ip": np.full(MAX_PACKETS, -1, np.int64),  # -1 = no IPv4 address
+            "dst_ip": np.full(MAX_PACKETS, -1, np.int64),
+            "src_port": np.zeros(MAX_PACKETS, np.uint16),
+            "dst_port": np.zeros(MAX_PACKETS, np.uint16),
+            "proto": np.zeros(MAX_PACKETS, np.uint8),
+        }
+        # Parsed packets waiting to be stored together (sniffer thread only)
+        self._batch = []
+        self._batch_started = time.monotonic()
+        self._parse_errors = 0  # Packets that failed to parse (sniffer thread only)
+        self.logs = LogBuffer()
+        self.scanner = PayloadScanner(SIGNATURES)
         
+    def _new_info(self, packet_size):
+        """Create the record for a newly captured packet with default fields."""
+        packet_id = format(next(self._id_seq), "x") + self._id_suffix
+        return PacketRecord(packet_id, time.time(), packet_size)
+    
     def get_packet_info(self, packet):
         """Extract comprehensive packet information for analysis."""
-        packet_id = str(uuid.uuid4())
-        timestamp = datetime.now().isoformat()
-        
         # Get packet size safely
         try:
             packet_size = len(packet)
         except:
             packet_size = 0
         
-        info = {
-            "id": packet_id,
-            "timestamp": timestamp,
-            "summary": "",
-            "protocol": "Unknown",
-            "src_ip": None,
-            "dst_ip": None,
-            "src_port": None,
-            "dst_port": None,
-            "size": packet_size,
-            "flags": None,
-            "payload_preview": None,
-            "raw_data": None
-        }
+        info = self._new_info(packet_size)
+        
+        # Walk the layer chain once; "X in packet" / packet[X] would rescan it per check
+        layers = {}
+        layer = packet
+        while layer:
+            layers.setdefault(layer.__class__, layer)
+            layer = layer.payload
+        ip_layer = layers.get(IP)
+        raw = layers.get(Raw)
         
         # Extract IP layer info
-        if IP in packet:
-            ip_layer = packet[IP]
-            info["src_ip"] = ip_layer.src
-            info["dst_ip"] = ip_layer.dst
-            info["protocol"] = ip_layer.proto
+        if ip_layer is not None:
+            info.src_ip = ip_layer.src
+            info.dst_ip = ip_layer.dst
+            info.src_ip4 = ipv4_to_int(ip_layer.src)
+            info.dst_ip4 = ipv4_to_int(ip_layer.dst)
+            info.protocol = ip_layer.proto
             
             # TCP
-            if TCP in packet:
-                tcp = packet[TCP]
-                info["src_port"] = tcp.sport
-                info["dst_port"] = tcp.dport
-                info["protocol"] = "TCP"
-                info["flags"] = str(tcp.flags)
-                
-                # Check if this is a websocket connection (exclude it)
-                if (tcp.sport == WEBSOCKET_PORT or tcp.dport == WEBSOCKET_PORT):
-                    return None
+            if TCP in layers:
+                tcp = layers[TCP]
+                info.src_port = tcp.sport
+                info.dst_port = tcp.dport
+                info.protocol = "TCP"
+                info.flags = str(tcp.flags)
                 
                 # Payload preview
-                if Raw in packet:
-                    payload = bytes(packet[Raw].load)
-                    info["payload_preview"] = payload[:100].hex() if len(payload) > 0 else None
-                    info["raw_data"] = payload.hex()
+                if raw is not None:
+                    info.payload = bytes(raw.load)
                 
-                info["summary"] = f"TCP {ip_layer.src}:{tcp.sport} -> {ip_layer.dst}:{tcp.dport} [{tcp.flags}]"
+                info.summary = f"TCP {ip_layer.src}:{tcp.sport} -> {ip_layer.dst}:{tcp.dport} [{tcp.flags}]"
             
             # UDP
-            elif UDP in packet:
-                udp = packet[UDP]
-                info["src_port"] = udp.sport
-                info["dst_port"] = udp.dport
-                info["protocol"] = "UDP"
+            elif UDP in layers:
+                udp = layers[UDP]
+                info.src_port = udp.sport
+                info.dst_port = udp.dport
+                info.protocol = "UDP"
                 
-                if Raw in packet:
-                    payload = bytes(packet[Raw].load)
-                    info["payload_preview"] = payload[:100].hex() if len(payload) > 0 else None
-                    info["raw_data"] = payload.hex()
+                if raw is not None:
+                    info.payload = bytes(raw.load)
                 
-                info["summary"] = f"UDP {ip_layer.src}:{udp.sport} -> {ip_layer.dst}:{udp.dport}"
+                info.summary = f"UDP {ip_layer.src}:{udp.sport} -> {ip_layer.dst}:{udp.dport}"
             
             # ICMP
-            elif ICMP in packet:
-                icmp = packet[ICMP]
-                info["protocol"] = "ICMP"
-                info["summary"] = f"ICMP {ip_layer.src} -> {ip_layer.dst} type={icmp.type}"
+            elif ICMP in layers:
+                icmp = layers[ICMP]
+                info.protocol = "ICMP"
+                info.summary = f"ICMP {ip_layer.src} -> {ip_layer.dst} type={icmp.type}"
         
         # IPv6
-        elif IPv6 in packet:
-            ipv6 = packet[IPv6]
-            info["src_ip"] = ipv6.src
-            info["dst_ip"] = ipv6.dst
-            info["protocol"] = "IPv6"
-            info["summary"] = f"IPv6 {ipv6.src} -> {ipv6.dst}"
+        elif IPv6 in layers:
+            ipv6 = layers[IPv6]
+            info.src_ip = ipv6.src
+            info.dst_ip = ipv6.dst
+            info.protocol = "IPv6"
+            info.summary = f"IPv6 {ipv6.src} -> {ipv6.dst}"
         
         # ARP
-        elif ARP in packet:
-            arp = packet[ARP]
-            info["protocol"] = "ARP"
-            info["src_ip"] = arp.psrc
-            info["dst_ip"] = arp.pdst
-            info["summary"] = f"ARP {arp.psrc} -> {arp.pdst}"
+        elif ARP in layers:
+            arp = layers[ARP]
+            info.protocol = "ARP"
+            info.src_ip = arp.psrc
+            info.dst_ip = arp.pdst
+            info.src_ip4 = ipv4_to_int(arp.psrc)
+            info.dst_ip4 = ipv4_to_int(arp.pdst)
+            info.summary = f"ARP {arp.psrc} -> {arp.pdst}"
         
         else:
             # Try to get a summary even for unknown packets
             try:
-                info["summary"] = f"Unknown protocol: {packet.summary()}"
+                info.summary = f"Unknown protocol: {packet.summary()}"
             except:
-                info["summary"] = "Unknown/Unsupported packet type"
+                info.summary = "Unknown/Unsupported packet type"
         
-        # Add full packet hex dump for detailed analysis
+        # Keep the full packet bytes for the hex dump in detailed analysis
         try:
-            info["packet_hex"] = packet.hex()
+            info.frame = bytes(packet)
         except:
-            try:
-                info["packet_hex"] = bytes(packet).hex()
-            except:
-                info["packet_hex"] = ""
+            pass
+        
+        if info.payload and self.scanner.at_capture:
+            info.tags = self.scanner.scan(info.payload)
         
         return info
     
+    def parse_frame(self, frame, hatype=ARPHRD_ETHER, proto=0, timestamp=None, size=None):
+        """Extract the same fields as get_packet_info from raw frame bytes.
+        
+        Fast path for the raw-socket backends: headers are unpacked with struct
+        instead of building Scapy layers. size is the length on the wire when
+        frame was truncated. Returns None for websocket traffic.
+        """
+        info = self._new_info(len(frame) if size is None else size)
+        if timestamp is not None:
+            info.timestamp = timestamp
+        info.frame = frame
+        info.truncated = len(frame) < info.size
+        
+        # Link layer: Ethernet (and loopback, which uses the same header) or none
+        if hatype == ARPHRD_ETHER or hatype == ARPHRD_LOOPBACK:
+            if len(frame) < 14:
+                info.summary = "Unknown/Unsupported packet type"
+                return info
+            eth_type = _ETH_TYPE.unpack_from(frame, 12)[0]
+            offset = 14
+            while eth_type in (0x8100, 0x88A8) and len(frame) >= offset + 4:  # VLAN tags
+                eth_type = _ETH_TYPE.unpack_from(frame, offset + 2)[0]
+                offset += 4
+        else:
+            eth_type = proto
+            offset = 0
+        
+        # IPv4
+        if eth_type == 0x0800 and len(frame) >= offset + 20:
+            ver_ihl, _, total_len, _, frag, _, ip_proto, _, src, dst = _IPV4.unpack_from(frame, offset)
+            src_ip = socket.inet_ntoa(src)
+            dst_ip = socket.inet_ntoa(dst)
+            info.src_ip = src_ip
+            info.dst_ip = dst_ip
+            info.src_ip4 = int.from_bytes(src, "big")
+            info.dst_ip4 = int.from_bytes(dst, "big")
+            info.protocol = ip_proto
+            l4 = offset + (ver_ihl & 0x0F) * 4
+            end = min(len(frame), offset + total_len)  # Drop Ethernet padding
+            if frag & 0x1FFF:
+                return info  # Non-first fragment: no L4 header
+            
+            # TCP
+            if ip_proto == 6 and end >= l4 + 20:
+                sport, dport, _, _, off_ns, flag_bits, _, _, _ = _TCP.unpack_from(frame, l4)
+                if sport == WEBSOCKET_PORT or dport == WEBSOCKET_PORT:
+                    return None  # Only reached when the BPF filter could not be attached
+                flags = _TCP_FLAG_STRINGS[((off_ns & 0x01) << 8) | flag_bits]
+                info.src_port = sport
+                info.dst_port = dport
+                info.protocol = "TCP"
+                info.flags = flags
+                
+                # Payload preview
+                payload = frame[l4 + (off_ns >> 4) * 4:end]
+                if payload:
+                    info.payload = payload
+                
+                info.summary = f"TCP {src_ip}:{sport} -> {dst_ip}:{dport} [{flags}]"
+            
+            # UDP
+            elif ip_proto == 17 and end >= l4 + 8:
+                sport, dport, _, _ = _UDP.unpack_from(frame, l4)
+                info.src_port = sport
+                info.dst_port = dport
+                info.protocol = "UDP"
+                
+                payload = frame[l4 + 8:end]
+                if payload:
+                    info.payload = payload
+                
+                info.summary = f"UDP {src_ip}:{sport} -> {dst_ip}:{dport}"
+            
+            # ICMP
+            elif ip_proto == 1 and end > l4:
+                info.protocol = "ICMP"
+                info.summary = f"ICMP {src_ip} -> {dst_ip} type={frame[l4]}"
+        
+        # IPv6
+        elif eth_type == 0x86DD and len(frame) >= offset + 40:
+            _, _, _, _, src, dst = _IPV6.unpack_from(frame, offset)
+            src_ip = socket.inet_ntop(socket.AF_INET6, src)
+            dst_ip = socket.inet_ntop(socket.AF_INET6, dst)
+            info.src_ip = src_ip
+            info.dst_ip = dst_ip
+            info.protocol = "IPv6"
+            info.summary = f"IPv6 {src_ip} -> {dst_ip}"
+        
+        # ARP (IPv4 over Ethernet)
+        elif eth_type == 0x0806 and len(frame) >= offset + 28:
+            arp = _ARP_IPV4.unpack_from(frame, offset)
+            psrc = socket.inet_ntoa(arp[6])
+            pdst = socket.inet_ntoa(arp[8])
+            info.protocol = "ARP"
+            info.src_ip = psrc
+            info.dst_ip = pdst
+            info.src_ip4 = int.from_bytes(arp[6], "big")
+            info.dst_ip4 = int.from_bytes(arp[8], "big")
+            info.summary = f"ARP {psrc} -> {pdst}"
+        
+        else:
+            info.summary = f"Unknown protocol: ethertype 0x{eth_type:04x}"
+        
+        if info.payload and self.scanner.at_capture:
+            info.tags = self.scanner.scan(info.payload)
+        
+        return info
+    
+    def _store_packets(self, batch):
+        """Write a batch of parsed packets into the ring and index (sniffer thread only)."""
+        cols = self.cols
+        packets = self.packets
+        seq = self.packet_counter
+        for packet_info in batch:
+            slot = seq % MAX_PACKETS
+            evicted = packets[slot]
+            if evicted is not None:
+                del self._by_id[evicted.id]
+            self._by_id[packet_info.id] = (seq, packet_info)
+            
+            # The seq column is written first so readers can detect a slot
+            # being overwritten underneath them.
+            cols["seq"][slot] = seq
+            cols["ts"][slot] = packet_info.timestamp
+            src_ip4 = packet_info.src_ip4
+            dst_ip4 = packet_info.dst_ip4
+            cols["src_ip"][slot] = -1 if src_ip4 is None else src_ip4
+            cols["dst_ip"][slot] = -1 if dst_ip4 is None else dst_ip4
+            cols["src_port"][slot] = packet_info.src_port or 0
+            cols["dst_port"][slot] = packet_info.dst_port or 0
+            protocol = packet_info.protocol
+            cols["proto"][slot] = protocol if isinstance(protocol, int) else PROTO_NUMBERS.get(protocol, 0)
+            packets[slot] = packet_info
+            # Counter is bumped only once the slot is complete
+            self.packet_counter = seq + 1
+            
+            # Debug: print first few packets
+            if seq < 5:
+                self.logs.write(f"Captured packet #{seq + 1}: {packet_info.summary}")
+            seq += 1
+    
+    def _flush_batch(self):
+        """Store the packets collected since the last flush."""
+        if self._batch:
+            batch, self._batch = self._batch, []
+            self._store_packets(batch)
+        self._batch_started = time.monotonic()
+    
+    def _report_parse_error(self, error):
+        """Log a packet that failed to parse, rate-limited so a stream of
+        malformed frames doesn't flood stdout and slow the capture down."""
+        self._parse_errors += 1
+        if self._parse_errors <= 5 or self._parse_errors % 1000 == 0:
+            self.logs.write(f"Error processing packet #{self._parse_errors}: {error!r}")
+    
     def packet_handler(self, packet):
-        """Handle each captured packet."""
+        """Handle each captured packet (collected into a batch, see _flush_batch)."""
         if not self.is_sniffing:
             return
         
         try:
-            packet_info = self.get_packet_info(packet)
-            if packet_info is None:  # Filtered out (e.g., websocket)
-                return
-            
-            with self.packet_lock:
-                self.packets.append(packet_info)
-                self.packet_counter += 1
-                
-            # Debug: print first few packets
-            if self.packet_counter <= 5:
-                print(f"Captured packet #{self.packet_counter}: {packet_info['summary']}")
+            self._batch.append(self.get_packet_info(packet))
+        except Exception as e:
+            self._report_parse_error(e)
+        if len(self._batch) >= BATCH_SIZE or time.monotonic() - self._batch_started >= BATCH_MAX_DELAY:
+            self._flush_batch()
+    
+    def raw_packet_handler(self, frame, hatype, proto, timestamp=None, size=None):
+        """Handle a frame read from a raw socket (see parse_frame for the arguments)."""
+        try:
+            packet_info = self.parse_frame(frame, hatype, proto, timestamp, size)
+            if packet_info is not None:
+                self._batch.append(packet_info)
         except Exception as e:
-            print(f"Error processing packet: {e}")
-            import traceback
-            traceback.print_exc()
+            self._report_parse_error(e)
     
     def start_sniffing(self, interface=None):
         """Start packet sniffing in a separate thread."""
@@ -168,6 +728,12 @@ class PacketSniffer:
         def sniff_loop():
             try:
                 print("Sniffing loop started, waiting for packets...")
+                backend = {"process": self.process_sniff, "raw": self.raw_sniff}.get(CAPTURE_BACKEND)
+                if backend and backend(interface):
+                    print("Sniffing stopped normally")
+                    return
+                capture_filter = CAPTURE_FILTER
+                lfilter = None
                 # Use a loop with timeout to allow periodic checking of is_sniffing
                 while self.is_sniffing:
                     try:
@@ -178,9 +744,12 @@ class PacketSniffer:
                             count=0,  # Capture all packets until timeout or stop_filter
                             store=False,
                             iface=interface,
+                            filter=capture_filter,
+                            lfilter=lfilter,
                             timeout=1,  # Check every 1 second
                             stop_filter=lambda p: not self.is_sniffing
                         )
+                        self._flush_batch()  # Store the partial batch left at timeout
                         # After timeout, check if we should continue
                         if not self.is_sniffing:
                             break
@@ -192,11 +761,16 @@ class PacketSniffer:
                         # Timeout exceptions are expected and fine
                         if "timeout" in error_str:
                             continue
+                        # No libpcap to compile the BPF filter: filter in Python instead
+                        if capture_filter and "filter" in error_str:
+                            print(f"BPF filter unavailable ({sniff_err}), filtering websocket traffic in Python")
+                            capture_filter = None
+                            lfilter = not_websocket
+                            continue
                         # Other errors might be serious
                         print(f"Sniffing error: {sniff_err}")
                         # Don't print full traceback for timeouts
                         if "timeout" not in error_str:
-                            import traceback
                             traceback.print_exc()
                         # Continue trying
                         time.sleep(0.5)
@@ -206,7 +780,6 @@ class PacketSniffer:
                 self.is_sniffing = False
             except Exception as e:
                 print(f"Fatal sniffing error: {e}")
-                import traceback
                 traceback.print_exc()
                 self.is_sniffing = False
                 # On Windows, might need Npcap - provide helpful error
@@ -224,38 +797,175 @@ class PacketSniffer:
         print("Sniffing thread started")
         return True
     
+    def raw_sniff(self, interface=None):
+        """Capture from an AF_PACKET socket until stopped (Linux fast path).
+        
+        Returns False without capturing if raw sockets are unavailable, so the
+        caller can fall back to Scapy.
+        """
+        capture = RawCapture.open(interface)
+        if capture is None:
+            return False
+        with capture:
+            while self.is_sniffing:
+                # Wait at most a second so is_sniffing is rechecked
+                for frame, hatype, proto, timestamp, length in capture.read(1):
+                    self.raw_packet_handler(frame, hatype, proto, timestamp, length)
+                self._flush_batch()
+        return True
+    
+    def process_sniff(self, interface=None):
+        """Capture in a separate process and ingest frames from shared memory.
+        
+        The capture process only receives frames into the ring, so it keeps
+        draining the socket while this process is busy parsing or serving
+        HTTP requests. Returns False if raw sockets are unavailable and raises
+        RuntimeError if the capture process exits before sniffing is stopped.
+        """
+        if not hasattr(socket, "AF_PACKET"):
+            return False
+        try:
+            socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL)).close()
+        except OSError as e:
+            print(f"Raw socket capture unavailable ({e}), falling back to Scapy")
+            return False
+        
+        ctx = multiprocessing.get_context("spawn")  # Don't fork the threaded Flask process
+        shm = shared_memory.SharedMemory(create=True, size=RING_SLOTS * RING_SLOT_SIZE)
+        head = ctx.Value("Q", 0, lock=False)  # Single writer: the capture process
+        stop = ctx.Event()
+        proc = ctx.Process(target=capture_process, args=(shm.name, head, stop, interface), daemon=True)
+        proc.start()
+        
+        buf = shm.buf
+        hdr_size = _RING_HDR.size
+        tail = 0
+        try:
+            while self.is_sniffing and proc.is_alive():
+                end = head.value
+                if end == tail:
+                    time.sleep(0.01)
+                    continue
+                # The writer fills slot seq + RING_SLOTS while head == seq + RING_SLOTS,
+                # so only the last RING_SLOTS - 1 sequence numbers are safe to read
+                if end - tail >= RING_SLOTS:
+                    self.logs.write(f"Capture ring overrun, skipped {end - tail - RING_SLOTS + 1} packets")
+                    tail = end - RING_SLOTS + 1
+                for seq in range(tail, min(end, tail + BATCH_SIZE)):
+                    offset = (seq % RING_SLOTS) * RING_SLOT_SIZE
+                    captured, timestamp, hatype, proto, length = _RING_HDR.unpack_from(buf, offset)
+                    frame = bytes(buf[offset + hdr_size:offset + hdr_size + captured])
+                    # Header and frame are only trusted if the writer hadn't started
+                    # reusing the slot by the time we finished copying them
+                    if head.value - seq >= RING_SLOTS:
+                        continue
+                    self.raw_packet_handler(frame, hatype, proto, timestamp, length)
+                tail = min(end, tail + BATCH_SIZE)
+                self._flush_batch()
+        finally:
+            stop.set()
+            proc.join(timeout=5)
+            shm.close()
+            shm.unlink()
+        if self.is_sniffing:
+            # The capture process died on its own (bad interface, bind/filter error, ...)
+            raise RuntimeError(f"Capture process exited unexpectedly (exit code {proc.exitcode})")
+        return True
+    
     def stop_sniffing(self):
         """Stop packet sniffing."""
         self.is_sniffing = False
         return True
     
+    def packets_in_memory(self):
+        """Number of packets currently held in the ring."""
+        return min(self.packet_counter, MAX_PACKETS)
+    
+    def _read_window(self, start, end):
+        """Packets with sequence numbers start..end-1, oldest first.
+        
+        Reads the ring without locking: slots the sniffer overwrote while we
+        sliced them are detected through the seq column and left out.
+        """
+        if start >= end:
+            return []
+        first, last = start % MAX_PACKETS, end % MAX_PACKETS
+        if first < last:
+            window = self.packets[first:last]
+        else:
+            window = self.packets[first:] + self.packets[:last]
+        # The sniffer writes the seq column before the record, so a record
+        # sliced above whose seq still matches is the one we asked for.
+        expected = np.arange(start, end)
+        valid = self.cols["seq"][expected % MAX_PACKETS] == expected
+        return [pkt for pkt, ok in zip(window, valid.tolist()) if ok]
+    
     def get_packets(self, limit=100):
         """Get recent packets."""
-        with self.packet_lock:
-            return list(self.packets)[-limit:]
+        count = self.packet_counter
+        return self._read_window(count - min(max(limit, 0), MAX_PACKETS, count), count)
     
     def get_packet_by_id(self, packet_id):
         """Get a specific packet by ID."""
-        with self.packet_lock:
-            for pkt in self.packets:
-                if pkt["id"] == packet_id:
-                    return pkt
-        return None
+        entry = self._by_id.get(packet_id)
+        return entry[1] if entry else None
     
     def get_packet_context(self, packet_id, before=5, after=5):
         """Get a packet and its context (before/after packets)."""
-        with self.packet_lock:
-            packets_list = list(self.packets)
-            for i, pkt in enumerate(packets_list):
-                if pkt["id"] == packet_id:
-                    start_idx = max(0, i - before)
-                    end_idx = min(len(packets_list), i + after + 1)
-                    return packets_list[start_idx:end_idx]
-        return []
+        entry = self._by_id.get(packet_id)
+        if entry is None:
+            return []
+        seq, packet = entry
+        count = self.packet_counter
+        window = self._read_window(max(seq - before, count - MAX_PACKETS, 0), min(seq + after + 1, count))
+        # Evicted while we read it
+        if not any(pkt is packet for pkt in window):
+            return []
+        return window
+    
+    def query_packets(self, src_ip=None, dst_ip=None, src_port=None, dst_port=None,
+                      proto=None, since=None, until=None, limit=100):
+        """Get the most recent packets matching all given filters.
+        
+        IPs are IPv4 addresses as integers (see ipv4_to_int), proto an IP protocol
+        number and since/until epoch seconds. Runs as vectorized compares over
+        the columns instead of a Python loop over packets.
+        """
+        cols = self.cols
+        count = self.packet_counter
+        mask = np.ones(MAX_PACKETS, dtype=bool)
+        if src_ip is not None:
+            mask &= cols["src_ip"] == src_ip
+        if dst_ip is not None:
+            mask &= cols["dst_ip"] == dst_ip
+        if src_port is not None:
+            mask &= cols["src_port"] == src_port
+        if dst_port is not None:
+            mask &= cols["dst_port"] == dst_port
+        if proto is not None:
+            mask &= cols["proto"] == proto
+        if since is not None:
+            mask &= cols["ts"] >= since
+        if until is not None:
+            mask &= cols["ts"] <= until
+        # Snapshot seq last: a slot the sniffer started overwriting after the
+        # compares above has a seq >= count and is excluded here.
+        seq = cols["seq"].copy()
+        mask &= (seq >= 0) & (seq < count)
+        
+        slots = np.flatnonzero(mask)
+        seqs = seq[slots]
+        order = np.argsort(seqs)[-limit:] if limit > 0 else []
+        results = []
+        for slot, slot_seq in zip(slots[order], seqs[order]):
+            record = self.packets[slot]
+            if cols["seq"][slot] == slot_seq:  # Not overwritten while we read it
+                results.append(record)
+        return results
 
 
 # Flask server to serve packet data
-from flask import Flask, jsonify, request
+from flask import Flask, Response, request
 from flask_cors import CORS
 
 app = Flask(__name__)
@@ -263,21 +973,109 @@ CORS(app)
 
 sniffer = PacketSniffer()
 
+def fastjson(obj):
+    """JSON response encoded with orjson, which is several times faster than
+    jsonify's stdlib encoder on packet lists and takes NumPy values as-is."""
+    return Response(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY), mimetype="application/json")
+
+@functools.lru_cache(maxsize=4096)
+def _iso_second(sec):
+    """Local-time ISO prefix ("YYYY-MM-DDTHH:MM:SS") of an epoch second."""
+    return datetime.fromtimestamp(sec).strftime("%Y-%m-%dT%H:%M:%S")
+
+def iso_timestamp(ts):
+    """ISO form of an epoch timestamp, with microseconds.
+    
+    Packets arrive many per second, so the date/time part is formatted once
+    per second and only the microsecond suffix is built per packet.
+    """
+    # Same rounding as datetime.fromtimestamp
+    frac, sec = math.modf(ts)
+    usec = round(frac * 1_000_000)
+    if usec >= 1_000_000:
+        sec, usec = sec + 1, usec - 1_000_000
+    return f"{_iso_second(int(sec))}.{usec:06d}"
+
+def serialize_packet(packet, include_packet_hex=True):
+    """Convert a stored packet into its JSON form (ISO timestamp, hex payloads).
+    
+    The full packet hex dump and payload text are only rendered when
+    include_packet_hex is set, so list views don't pay for encoding data they
+    never display.
+    """
+    data = packet.asdict()
+    data["timestamp"] = iso_timestamp(packet.timestamp)
+    payload = packet.payload
+    if payload and not sniffer.scanner.at_capture:
+        data["tags"] = sniffer.scanner.scan(payload)
+    # One hex pass per payload; the preview (first 100 bytes) is a slice of it
+    raw_data = payload.hex() if payload is not None else None
+    data["payload_preview"] = raw_data[:200] if payload else None
+    data["raw_data"] = raw_data
+    if include_packet_hex:
+        # Text payloads (HTTP, SMTP, ...) are also served as text, which reads far better than hex
+        data["payload_text"] = payload.decode("ascii") if payload and is_printable(payload) else None
+        data["packet_hex"] = packet.frame.hex()
+    return data
+
 @app.route("/api/packets", methods=["GET"])
 def get_packets():
     """Get recent packets."""
     limit = request.args.get("limit", 100, type=int)
     packets = sniffer.get_packets(limit)
-    return jsonify({"packets": packets, "count": len(packets)})
+    return fastjson({
+        "packets": [serialize_packet(p, include_packet_hex=False) for p in packets],
+        "count": len(packets)
+    })
 
 
+@app.route("/api/packets/query", methods=["GET"])
+def query_packets():
+    """Filter buffered packets by IPv4 address, port, protocol and time range."""
+    args = request.args
+    filters = {}
+    for name in ("src_ip", "dst_ip"):
+        if name in args:
+            # Strict dotted-quad parsing (inet_aton also takes "1.2.3" and trailing junk)
+            try:
+                filters[name] = int(ipaddress.IPv4Address(args[name]))
+            except ValueError:
+                return fastjson({"error": f"{name} must be an IPv4 address"}), 400
+    for name in ("src_port", "dst_port"):
+        if name in args:
+            filters[name] = args.get(name, type=int)
+            if filters[name] is None or not 0 < filters[name] < 65536:
+                return fastjson({"error": f"{name} must be a port number"}), 400
+    if "proto" in args:
+        proto = args["proto"]
+        filters["proto"] = PROTO_NUMBERS.get(proto.upper())
+        if filters["proto"] is None:
+            try:
+                filters["proto"] = int(proto)
+            except ValueError:
+                pass
+        if filters["proto"] is None or not 0 <= filters["proto"] <= 255:
+            return fastjson({"error": "proto must be tcp, udp, icmp or an IP protocol number"}), 400
+    for name in ("since", "until"):
+        if name in args:
+            filters[name] = args.get(name, type=float)
+            if filters[name] is None:
+                return fastjson({"error": f"{name} must be epoch seconds"}), 400
+    
+    limit = args.get("limit", 100, type=int)
+    packets = sniffer.query_packets(limit=limit, **filters)
+    return fastjson({
+        "packets": [serialize_packet(p, include_packet_hex=False) for p in packets],
+        "count": len(packets)
+    })
+
 @app.route("/api/packets/<packet_id>", methods=["GET"])
 def get_packet(packet_id):
     """Get a specific packet by ID."""
     packet = sniffer.get_packet_by_id(packet_id)
     if packet:
-        return jsonify(packet)
-    return jsonify({"error": "Packet not found"}), 404
+        return fastjson(serialize_packet(packet))
+    return fastjson({"error": "Packet not found"}), 404
 
 @app.route("/api/packets/<packet_id>/context", methods=["GET"])
 def get_packet_context(packet_id):
@@ -286,8 +1084,18 @@ def get_packet_context(packet_id):
     after = request.args.get("after", 10, type=int)
     context = sniffer.get_packet_context(packet_id, before, after)
     if context:
-        return jsonify({"packets": context, "count": len(context)})
-    return jsonify({"error": "Packet not found"}), 404
+        return fastjson({"packets": [serialize_packet(p) for p in context], "count": len(context)})
+    return fastjson({"error": "Packet not found"}), 404
+
+@app.route("/api/logs", methods=["GET"])
+def get_logs():
+    """Get recent capture log messages (first packets, parse errors, overruns)."""
+    limit = request.args.get("limit", 100, type=int)
+    logs = sniffer.logs.recent(limit)
+    return fastjson({
+        "logs": [{"timestamp": iso_timestamp(ts), "message": message} for ts, message in logs],
+        "count": len(logs)
+    })
 
 @app.route("/api/monitoring/start", methods=["POST"])
 def start_monitoring():
@@ -295,28 +1103,26 @@ def start_monitoring():
     try:
         interface = request.json.get("interface") if request.json else None
         success = sniffer.start_sniffing(interface)
-        return jsonify({
+        return fastjson({
             "status": "started" if success else "already_running",
             "is_sniffing": sniffer.is_sniffing
         })
     except Exception as e:
         print(f"Error starting monitoring: {e}")
-        import traceback
         traceback.print_exc()
-        return jsonify({"status": "error", "error": str(e)}), 500
+        return fastjson({"status": "error", "error": str(e)}), 500
 
 @app.route("/api/monitoring/stop", methods=["POST"])
 def stop_monitoring():
     """Stop packet monitoring."""
     sniffer.stop_sniffing()
-    return jsonify({"status": "stopped"})
+    return fastjson({"status": "stopped"})
 
 @app.route("/api/monitoring/status", methods=["GET"])
 def monitoring_status():
     """Get monitoring status."""
-    with sniffer.packet_lock:
-        packet_list_size = len(sniffer.packets)
-    return jsonify({
+    packet_list_size = sniffer.packets_in_memory()
+    return fastjson({
         "is_sniffing": sniffer.is_sniffing,
         "packet_count": sniffer.packet_counter,
         "packets_in_memory": packet_list_size
@@ -333,10 +1139,9 @@ def test_endpoint():
         interfaces = [f"Error getting interfaces: {e}"]
         default_iface = "unknown"
     
-    with sniffer.packet_lock:
-        packet_count = len(sniffer.packets)
+    packet_count = sniffer.packets_in_memory()
     
-    return jsonify({
+    return fastjson({
         "status": "ok",
         "sniffer_initialized": sniffer is not None,
         "is_sniffing": sniffer.is_sniffing if sniffer else False,
@@ -367,7 +1172,6 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\nWarning: Could not list interfaces: {e}")
         print("Make sure Scapy is properly installed and you have the required permissions")
-        import traceback
         traceback.print_exc()
     
     # Test if we can actually capture a packet (quick test)
@@ -300,13 +300,22 @@ function formatPacketForAI(packet, isTarget = false) {
   parts.push(`Source: ${packet.src_ip || 'N/A'}:${packet.src_port || 'N/A'}`);
   parts.push(`Destination: ${packet.dst_ip || 'N/A'}:${packet.dst_port || 'N/A'}`);
   parts.push(`Size: ${packet.size} bytes`);
+  if (packet.truncated) parts.push('Truncated: only the start of this packet was captured, so payload and signature matches are incomplete');
   if (packet.flags) parts.push(`Flags: ${packet.flags}`);
+  if (packet.tags && packet.tags.length) parts.push(`Signature Matches: ${packet.tags.join(', ')}`);
   
   if (isTarget) {
     // Full details for target packet
     if (packet.payload_preview) {
       parts.push(`Payload Preview: ${packet.payload_preview}`);
     }
+    if (packet.payload_text) {
+      // Printable payloads are also sent as text, which the model reads far better than hex
+      const payloadText = packet.payload_text.length > 500
+        ? packet.payload_text.substring(0, 500) + '...'
+        : packet.payload_text;
+      parts.push(`Payload Text: ${payloadText}`);
+    }
     if (packet.raw_data) {
       // Limit raw_data to 500 chars to avoid huge payloads
       const rawDataPreview = packet.raw_data.length > 500 